@@ -4,11 +4,15 @@ Offline Agricultural Advisor - Main Flask Application
 Provides voice-enabled farming guidance without internet dependency
 """
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
 import os
+import gzip
 import json
 import logging
+import mimetypes
+import zlib
+from functools import lru_cache
 from threading import Thread
 import time
 
@@ -22,16 +26,163 @@ except ImportError as e:
     print(f"⚠️ Some modules not available: {e}")
     MODELS_AVAILABLE = False
 
+# Try importing pyahocorasick for fast keyword matching, fallback to linear scan
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Try importing waitress so non-debug runs get a production WSGI server
+try:
+    import waitress
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+# Try importing brotli for precompressed static assets, fallback to gzip only
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Try importing orjson for fast JSON serialization, fallback to stdlib json
+try:
+    import orjson
+    from flask.json.provider import JSONProvider
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keyword -> response key mapping for the simple fallback advisor
+# (Hindi keywords resolve directly to their English response key)
+SIMPLE_KEYWORDS = {
+    'rice': 'rice', 'wheat': 'wheat', 'soil': 'soil',
+    'water': 'water', 'pest': 'pest', 'fertilizer': 'fertilizer',
+    'चावल': 'rice', 'गेहूं': 'wheat', 'मिट्टी': 'soil',
+    'पानी': 'water', 'कीट': 'pest', 'खाद': 'fertilizer'
+}
+
+if ORJSON_AVAILABLE:
+    class OrjsonProvider(JSONProvider):
+        """Flask JSON provider backed by orjson's C serializer"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+# Fallback categories served when the knowledge base is unavailable
+SIMPLE_CATEGORIES = [
+    {'id': 'crop_planning', 'name': {'en': 'Crop Planning', 'hi': 'फसल योजना'}},
+    {'id': 'soil_management', 'name': {'en': 'Soil Management', 'hi': 'मिट्टी प्रबंधन'}},
+    {'id': 'irrigation', 'name': {'en': 'Irrigation', 'hi': 'सिंचाई'}},
+    {'id': 'pest_disease', 'name': {'en': 'Pest Control', 'hi': 'कीट नियंत्रण'}},
+    {'id': 'fertilizers', 'name': {'en': 'Fertilizers', 'hi': 'उर्वरक'}},
+    {'id': 'weather_climate', 'name': {'en': 'Weather', 'hi': 'मौसम'}}
+]
+
+GREETING_WORDS = frozenset(('hello', 'hi', 'namaste', 'नमस्ते'))
+HELP_WORDS = frozenset(('help', 'सहायता', 'मदद'))
+HELP_PHRASES = ('what can you do',)
+
+# Static asset types worth precompressing at boot
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json')
+
+# Response timestamps only need second granularity, so refresh a cached
+# clock once per second instead of a time.time() syscall per request
+_cached_timestamp = time.time()
+
+def _refresh_timestamp():
+    global _cached_timestamp
+    while True:
+        _cached_timestamp = time.time()
+        time.sleep(1)
+
+Thread(target=_refresh_timestamp, daemon=True).start()
+
+def _make_simple_answer_fn(responses, automaton):
+    """Build an answer function specialized for one language's responses"""
+    hello_response = responses.get('hello', responses['default'])
+    help_response = responses.get('help', responses['default'])
+    default_response = responses['default']
+
+    def answer(question):
+        question_lower = question.lower()
+
+        if automaton is not None:
+            # Single linear scan finds greetings, help and keywords at once
+            is_greeting = False
+            is_help = False
+            first_keyword = None
+
+            for _, (tag, response_key) in automaton.iter(question_lower):
+                if tag == 'greet':
+                    is_greeting = True
+                elif tag == 'help':
+                    is_help = True
+                elif first_keyword is None:
+                    first_keyword = response_key
+
+            if is_greeting:
+                return hello_response
+            if is_help:
+                return help_response
+            if first_keyword and first_keyword in responses:
+                return responses[first_keyword]
+
+            return default_response
+
+        # Fallback: linear keyword scan when pyahocorasick is not installed
+        question_words = frozenset(question_lower.split())
+
+        if not GREETING_WORDS.isdisjoint(question_words):
+            return hello_response
+
+        if (not HELP_WORDS.isdisjoint(question_words) or
+                any(phrase in question_lower for phrase in HELP_PHRASES)):
+            return help_response
+
+        for keyword, response_key in SIMPLE_KEYWORDS.items():
+            if keyword in question_lower and response_key in responses:
+                return responses[response_key]
+
+        return default_response
+
+    return answer
+
 class FarmAdvisor:
     def __init__(self):
-        self.app = Flask(__name__, 
+        # Built-in static handler disabled - /static/ is served from the
+        # in-memory cache route below
+        self.app = Flask(__name__,
                         template_folder='../frontend',
-                        static_folder='../frontend/static')
+                        static_folder=None)
         CORS(self.app)
+
+        # Serialize API responses with orjson when available
+        if ORJSON_AVAILABLE:
+            self.app.json = OrjsonProvider(self.app)
+
+        # Only hand file sends off via X-Sendfile when a reverse proxy
+        # (nginx/Apache) that honors the header fronts the app - waitress
+        # and the dev server ignore it and would emit empty bodies
+        if os.environ.get('FARM_ADVISOR_X_SENDFILE') == '1':
+            self.app.config['USE_X_SENDFILE'] = True
+        self.app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 86400
+
+        # Preload small frontend assets into memory with precomputed ETags
+        self._build_static_cache()
+
+        # Encode the fallback categories payload once
+        self._categories_body = self.app.json.dumps(
+            {'categories': SIMPLE_CATEGORIES}).encode('utf-8')
         
         # Initialize components
         if MODELS_AVAILABLE:
@@ -43,10 +194,26 @@ class FarmAdvisor:
             self.knowledge_base = None
             self.db_manager = None
             self._create_simple_responses()
+            self._build_keyword_automaton()
+
+            # Specialize the answer function per language with the responses
+            # and automaton pre-captured
+            self._answer_fns = {
+                lang: _make_simple_answer_fn(responses, self.keyword_automaton)
+                for lang, responses in self._responses_by_language.items()
+            }
         
         # Setup routes
         self.setup_routes()
-        
+
+        # Pre-render the index template once - it takes no dynamic context
+        try:
+            with self.app.app_context():
+                self._index_html = render_template('index.html').encode('utf-8')
+        except Exception as e:
+            logger.error(f"Error pre-rendering index.html: {e}")
+            self._index_html = None
+
         # Application state
         self.is_listening = False
     
@@ -76,42 +243,119 @@ class FarmAdvisor:
                 'default': "मैं फसल योजना, मिट्टी प्रबंधन, सिंचाई, कीट नियंत्रण, उर्वरक, और मौसम अनुकूलन के बारे में प्रश्नों में सहायता कर सकता हूं। कृपया अपना विशिष्ट कृषि प्रश्न पूछें!"
             }
         }
-    
+
+        # Cache per-language references to skip dict dispatch on the ask path
+        self._responses_en = self.simple_responses['en']
+        self._responses_by_language = {
+            'en': self._responses_en,
+            'hi': self.simple_responses['hi']
+        }
+
+    def _build_static_cache(self):
+        """Preload static assets into memory with precomputed ETags"""
+        self._static_cache = {}
+        static_root = os.path.join(os.path.dirname(__file__), '../frontend/static')
+
+        if not os.path.isdir(static_root):
+            return
+
+        for dirpath, _, filenames in os.walk(static_root):
+            for name in filenames:
+                file_path = os.path.join(dirpath, name)
+                relative_path = os.path.relpath(file_path, static_root).replace(os.sep, '/')
+
+                try:
+                    with open(file_path, 'rb') as f:
+                        body = f.read()
+                    stat = os.stat(file_path)
+                except OSError as e:
+                    logger.error(f"Error caching static file {relative_path}: {e}")
+                    continue
+
+                etag = f'"{int(stat.st_mtime)}-{stat.st_size}-{zlib.adler32(body)}"'
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+                # Compress text assets once at boot; keep a variant only
+                # when it is actually smaller
+                gzip_body = None
+                brotli_body = None
+                if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                    compressed = gzip.compress(body, 9)
+                    if len(compressed) < len(body):
+                        gzip_body = compressed
+                    if BROTLI_AVAILABLE:
+                        compressed = brotli.compress(body, quality=11)
+                        if len(compressed) < len(body):
+                            brotli_body = compressed
+
+                self._static_cache[relative_path] = (body, gzip_body, brotli_body,
+                                                     etag, mimetype)
+
+        logger.info(f"Preloaded {len(self._static_cache)} static files into memory")
+
+    def _build_keyword_automaton(self):
+        """Build Aho-Corasick automaton matching all keywords in one pass"""
+        if not AHOCORASICK_AVAILABLE:
+            self.keyword_automaton = None
+            return
+
+        automaton = ahocorasick.Automaton()
+        for word in GREETING_WORDS:
+            automaton.add_word(word, ('greet', None))
+        for word in HELP_WORDS:
+            automaton.add_word(word, ('help', None))
+        for phrase in HELP_PHRASES:
+            automaton.add_word(phrase, ('help', None))
+        for word, response_key in SIMPLE_KEYWORDS.items():
+            automaton.add_word(word, ('keyword', response_key))
+        automaton.make_automaton()
+
+        self.keyword_automaton = automaton
+
     def _get_simple_answer(self, question: str, language: str = 'en') -> str:
         """Get answer using simple keyword matching"""
-        question_lower = question.lower()
-        responses = self.simple_responses.get(language, self.simple_responses['en'])
-        
-        # Check for greetings and help
-        if any(word in question_lower for word in ['hello', 'hi', 'namaste', 'नमस्ते']):
-            return responses.get('hello', responses['default'])
-        
-        if any(word in question_lower for word in ['help', 'what can you do', 'सहायता', 'मदद']):
-            return responses.get('help', responses['default'])
-        
-        # Check for farming keywords
-        keywords = ['rice', 'wheat', 'soil', 'water', 'pest', 'fertilizer', 'चावल', 'गेहूं', 'मिट्टी', 'पानी', 'कीट', 'खाद']
-        
-        for keyword in keywords:
-            if keyword in question_lower:
-                # Map Hindi keywords to English
-                keyword_map = {
-                    'चावल': 'rice', 'गेहूं': 'wheat', 'मिट्टी': 'soil', 
-                    'पानी': 'water', 'कीट': 'pest', 'खाद': 'fertilizer'
-                }
-                lookup_key = keyword_map.get(keyword, keyword)
-                
-                if lookup_key in responses:
-                    return responses[lookup_key]
-        
-        return responses['default']
+        return self._answer_fns.get(language, self._answer_fns['en'])(question)
         
     def setup_routes(self):
         """Setup Flask routes"""
-        
+
+        # Resolve component wiring once so hot routes close over the right
+        # implementation instead of re-checking availability per request
+        if self.knowledge_base:
+            answer_fn = self.knowledge_base.get_answer
+            kb_loaded_fn = self.knowledge_base.is_loaded
+        else:
+            answer_fn = self._get_simple_answer
+            kb_loaded_fn = lambda: True
+
+        if self.db_manager:
+            log_fn = self.db_manager.log_interaction
+            history_fn = self.db_manager.get_interaction_history
+        else:
+            log_fn = lambda *args, **kwargs: None
+            history_fn = lambda limit: []
+
+        if self.knowledge_base:
+            def categories_response():
+                return jsonify({'categories': self.knowledge_base.get_categories()})
+        else:
+            def categories_response():
+                # Serve the precomputed fallback payload
+                return Response(self._categories_body,
+                                mimetype='application/json',
+                                headers={'Cache-Control': 'public, max-age=3600'})
+
+        @lru_cache(maxsize=4096)
+        def cached_answer(question_key, language):
+            """Memoized answer lookup keyed by normalized (question, language)"""
+            return answer_fn(question_key, language)
+
         @self.app.route('/')
         def index():
             """Serve main interface"""
+            if self._index_html is not None:
+                return Response(self._index_html, mimetype='text/html')
+
             try:
                 return render_template('index.html')
             except Exception as e:
@@ -129,21 +373,45 @@ class FarmAdvisor:
         
         @self.app.route('/static/<path:filename>')
         def static_files(filename):
-            """Serve static files"""
-            try:
-                return send_from_directory('../frontend/static', filename)
-            except Exception as e:
-                logger.error(f"Error serving static file {filename}: {e}")
-                return "File not found", 404
-        
+            """Serve static files from the in-memory cache"""
+            cached = self._static_cache.get(filename)
+
+            if cached is None:
+                # File added after boot - fall back to disk
+                try:
+                    return send_from_directory('../frontend/static', filename)
+                except Exception as e:
+                    logger.error(f"Error serving static file {filename}: {e}")
+                    return "File not found", 404
+
+            body, gzip_body, brotli_body, etag, mimetype = cached
+
+            if request.headers.get('If-None-Match') == etag:
+                return Response(status=304, headers={'ETag': etag})
+
+            headers = {'ETag': etag,
+                       'Cache-Control': 'public, max-age=86400',
+                       'Vary': 'Accept-Encoding'}
+
+            # Pick the best precompressed variant the client accepts
+            accept_encoding = request.headers.get('Accept-Encoding', '')
+            if brotli_body is not None and 'br' in accept_encoding:
+                body = brotli_body
+                headers['Content-Encoding'] = 'br'
+            elif gzip_body is not None and 'gzip' in accept_encoding:
+                body = gzip_body
+                headers['Content-Encoding'] = 'gzip'
+
+            return Response(body, content_type=mimetype, headers=headers)
+
         @self.app.route('/api/status')
         def status():
             """System status check"""
             return jsonify({
                 'status': 'online',
                 'speech_available': True,  # Always True for browser-based speech
-                'database_loaded': self.knowledge_base.is_loaded() if self.knowledge_base else True,
-                'timestamp': time.time(),
+                'database_loaded': kb_loaded_fn(),
+                'timestamp': _cached_timestamp,
                 'speech_method': 'browser',
                 'models_available': MODELS_AVAILABLE
             })
@@ -159,21 +427,17 @@ class FarmAdvisor:
                 if not question:
                     return jsonify({'error': 'No question provided'}), 400
                 
-                # Get answer from knowledge base or simple responses
-                if self.knowledge_base:
-                    answer = self.knowledge_base.get_answer(question, language)
-                else:
-                    answer = self._get_simple_answer(question, language)
-                
+                # Get answer from knowledge base or simple responses (memoized)
+                answer = cached_answer(question.lower(), language)
+
                 # Log interaction if database available
-                if self.db_manager:
-                    self.db_manager.log_interaction(question, answer, 'text', language)
+                log_fn(question, answer, 'text', language)
                 
                 return jsonify({
                     'question': question,
                     'answer': answer,
                     'language': language,
-                    'timestamp': time.time()
+                    'timestamp': _cached_timestamp
                 })
                 
             except Exception as e:
@@ -241,12 +505,8 @@ class FarmAdvisor:
         def get_history():
             """Get interaction history"""
             try:
-                if self.db_manager:
-                    limit = request.args.get('limit', 10, type=int)
-                    history = self.db_manager.get_interaction_history(limit)
-                    return jsonify({'history': history})
-                else:
-                    return jsonify({'history': []})
+                limit = request.args.get('limit', 10, type=int)
+                return jsonify({'history': history_fn(limit)})
             except Exception as e:
                 logger.error(f"Error fetching history: {str(e)}")
                 return jsonify({'error': 'Failed to fetch history'}), 500
@@ -255,20 +515,7 @@ class FarmAdvisor:
         def get_categories():
             """Get available question categories"""
             try:
-                if self.knowledge_base:
-                    categories = self.knowledge_base.get_categories()
-                    return jsonify({'categories': categories})
-                else:
-                    # Return simple categories
-                    categories = [
-                        {'id': 'crop_planning', 'name': {'en': 'Crop Planning', 'hi': 'फसल योजना'}},
-                        {'id': 'soil_management', 'name': {'en': 'Soil Management', 'hi': 'मिट्टी प्रबंधन'}},
-                        {'id': 'irrigation', 'name': {'en': 'Irrigation', 'hi': 'सिंचाई'}},
-                        {'id': 'pest_disease', 'name': {'en': 'Pest Control', 'hi': 'कीट नियंत्रण'}},
-                        {'id': 'fertilizers', 'name': {'en': 'Fertilizers', 'hi': 'उर्वरक'}},
-                        {'id': 'weather_climate', 'name': {'en': 'Weather', 'hi': 'मौसम'}}
-                    ]
-                    return jsonify({'categories': categories})
+                return categories_response()
             except Exception as e:
                 logger.error(f"Error fetching categories: {str(e)}")
                 return jsonify({'error': 'Failed to fetch categories'}), 500
@@ -278,7 +525,21 @@ class FarmAdvisor:
         logger.info(f"Starting Farm Advisor on http://{host}:{port}")
         logger.info(f"Speech method: browser-based")
         logger.info(f"Models available: {MODELS_AVAILABLE}")
-        
+        logger.info("For production, serve static files from the web server, e.g. nginx: "
+                    "location /static/ { alias .../frontend/static/; sendfile on; }")
+
+        if not debug and WAITRESS_AVAILABLE:
+            # Multi-threaded production server instead of the single-threaded
+            # Werkzeug dev server
+            logger.info("Serving with waitress")
+            waitress.serve(self.app, host=host, port=port, threads=16)
+            return
+
+        if not debug:
+            logger.warning("waitress not installed - using the Flask dev server. "
+                           "For production run: gunicorn -w 4 -k gthread "
+                           "--threads 4 'app:create_app()'")
+
         self.app.run(host=host, port=port, debug=debug)
 
 def create_app():
@@ -8,12 +8,40 @@ import sqlite3
 import json
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional
 from contextlib import contextmanager
 
 logger = logging.getLogger(__name__)
 
+# Column order of the history SELECTs below
+HISTORY_COLUMNS = ('question', 'answer', 'language', 'input_method', 'timestamp')
+
+# SQL hoisted to constants so SQLite's statement cache always hits the
+# same interned strings instead of reparsing per call
+INSERT_INTERACTION_SQL = '''
+    INSERT INTO interactions
+    (question, answer, language, input_method, session_id, response_time_ms)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+SELECT_HISTORY_BY_SESSION_SQL = '''
+    SELECT question, answer, language, input_method, timestamp
+    FROM interactions
+    WHERE session_id = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+SELECT_HISTORY_SQL = '''
+    SELECT question, answer, language, input_method, timestamp
+    FROM interactions
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
 class DatabaseManager:
     def __init__(self, db_path: str = None):
         if db_path is None:
@@ -21,7 +49,24 @@ class DatabaseManager:
         
         self.db_path = db_path
         self.ensure_database_exists()
+
+        # Single shared connection: WAL lets reads proceed during writes and
+        # synchronous=NORMAL avoids a full fsync per transaction
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False,
+                                     isolation_level=None)
+        # Plain tuple rows - cheaper than sqlite3.Row and dict(zip(...))
+        # packs them by position anyway
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA temp_store=MEMORY')
+
         self.create_tables()
+
+        # Background writer batches interaction inserts off the request path
+        self._write_queue = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer_thread.start()
     
     def ensure_database_exists(self):
         """Ensure database directory exists"""
@@ -29,13 +74,9 @@ class DatabaseManager:
     
     @contextmanager
     def get_connection(self):
-        """Get database connection with context manager"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Enable dict-like access
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """Yield the shared database connection under the manager's lock"""
+        with self._lock:
+            yield self._conn
     
     def create_tables(self):
         """Create necessary database tables"""
@@ -54,63 +95,65 @@ class DatabaseManager:
                     response_time_ms INTEGER
                 )
             ''')
-            
-            conn.commit()
+
+            # Covering indexes so history queries are index walks, not
+            # full scans + sorts
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS ix_interactions_session_ts
+                ON interactions(session_id, timestamp DESC)
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS ix_interactions_ts
+                ON interactions(timestamp DESC)
+            ''')
+
             logger.info("Database tables created/verified successfully")
     
-    def log_interaction(self, question: str, answer: str, input_method: str = 'text', 
-                       language: str = 'en', session_id: str = None, 
-                       response_time_ms: int = None) -> int:
-        """Log a user interaction"""
-        try:
-            with self.get_connection() as conn:
-                cursor = conn.execute('''
-                    INSERT INTO interactions 
-                    (question, answer, language, input_method, session_id, response_time_ms)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (question, answer, language, input_method, session_id, response_time_ms))
-                
-                interaction_id = cursor.lastrowid
-                conn.commit()
-                
-                logger.info(f"Logged interaction: {question[:50]}... -> {answer[:50]}...")
-                return interaction_id
-                
-        except Exception as e:
-            logger.error(f"Error logging interaction: {str(e)}")
-            return -1
+    def _write_loop(self):
+        """Drain queued interactions and insert them in batched transactions"""
+        while True:
+            batch = [self._write_queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self._write_queue.get(timeout=0.05))
+                except queue.Empty:
+                    break
+
+            try:
+                with self.get_connection() as conn:
+                    # Explicit transaction so the whole batch commits once
+                    conn.execute('BEGIN')
+                    try:
+                        conn.executemany(INSERT_INTERACTION_SQL, batch)
+                        conn.execute('COMMIT')
+                    except Exception:
+                        conn.execute('ROLLBACK')
+                        raise
+
+                logger.info(f"Logged {len(batch)} interaction(s)")
+
+            except Exception as e:
+                logger.error(f"Error logging interaction batch: {str(e)}")
+
+    def log_interaction(self, question: str, answer: str, input_method: str = 'text',
+                       language: str = 'en', session_id: str = None,
+                       response_time_ms: int = None) -> None:
+        """Queue a user interaction for background logging"""
+        self._write_queue.put((question, answer, language, input_method,
+                              session_id, response_time_ms))
     
     def get_interaction_history(self, limit: int = 50, session_id: str = None) -> List[Dict]:
         """Get recent interaction history"""
         try:
             with self.get_connection() as conn:
                 if session_id:
-                    cursor = conn.execute('''
-                        SELECT question, answer, language, input_method, timestamp
-                        FROM interactions 
-                        WHERE session_id = ?
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    ''', (session_id, limit))
+                    cursor = conn.execute(SELECT_HISTORY_BY_SESSION_SQL,
+                                          (session_id, limit))
                 else:
-                    cursor = conn.execute('''
-                        SELECT question, answer, language, input_method, timestamp
-                        FROM interactions 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    ''', (limit,))
-                
-                interactions = []
-                for row in cursor.fetchall():
-                    interactions.append({
-                        'question': row['question'],
-                        'answer': row['answer'],
-                        'language': row['language'],
-                        'input_method': row['input_method'],
-                        'timestamp': row['timestamp']
-                    })
+                    cursor = conn.execute(SELECT_HISTORY_SQL, (limit,))
                 
-                return interactions
+                # Pack rows straight into dicts - no per-field Row lookups
+                return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall()]
                 
         except Exception as e:
             logger.error(f"Error fetching interaction history: {str(e)}")
@@ -4,23 +4,87 @@ Knowledge Base - Agricultural knowledge processing and retrieval
 Handles multilingual queries and provides contextual farming advice
 """
 
+import heapq
 import json
 import os
+import pickle
 import re
+import sys
 import logging
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 import unicodedata
 
+# Try importing rapidfuzz for C-level fuzzy matching, fallback to difflib
+try:
+    from rapidfuzz import fuzz
+    RAPIDFUZZ_AVAILABLE = True
+except ImportError:
+    RAPIDFUZZ_AVAILABLE = False
+
+# process.cdist scores all patterns in one C call but needs numpy
+try:
+    from rapidfuzz import process as rf_process
+    import numpy
+    RAPIDFUZZ_CDIST_AVAILABLE = RAPIDFUZZ_AVAILABLE
+except ImportError:
+    RAPIDFUZZ_CDIST_AVAILABLE = False
+
+# Try importing pyahocorasick for single-pass token matching
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# Try importing orjson for fast JSON parsing, fallback to stdlib json
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Precompiled normalization patterns
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_WS_RE = re.compile(r'\s+')
+
+# Deletion table for combining marks (Latin accents, Devanagari matras,
+# etc.) so diacritics are stripped in one C-level translate pass
+_COMBINING_DELETE = {codepoint: None for codepoint in range(0x0300, 0x3000)
+                     if unicodedata.combining(chr(codepoint))}
+
+@lru_cache(maxsize=4096)
+def _normalize_text(text: str) -> str:
+    """Normalize text for matching - cached since inputs repeat heavily"""
+    if not text.isascii():
+        # Skip the decompose pass when the text is already in NFKD form
+        if not unicodedata.is_normalized('NFKD', text):
+            text = unicodedata.normalize('NFKD', text)
+        text = text.translate(_COMBINING_DELETE)
+
+        # Combining marks above the table's range are rare - fall back to
+        # the per-character filter only when one may be present
+        if text and max(text) >= '\u3000':
+            text = ''.join(c for c in text if not unicodedata.combining(c))
+
+    # Remove punctuation and extra spaces
+    text = _PUNCT_RE.sub(' ', text)
+    text = _WS_RE.sub(' ', text).strip()
+
+    return text.lower()
+
 class KnowledgeBase:
     def __init__(self):
         self.data = {}
         self.categories = []
         self.keywords_index = {}
         self.load_data()
-        self.build_search_index()
+        if not self._load_index_cache():
+            self.build_search_index()
+            self._save_index_cache()
     
     def load_data(self):
         """Load agricultural knowledge base from JSON file"""
@@ -28,8 +92,11 @@ class KnowledgeBase:
         
         try:
             if os.path.exists(data_file):
-                with open(data_file, 'r', encoding='utf-8') as f:
-                    self.data = json.load(f)
+                # Read the whole file and parse the bytes in one go -
+                # much faster than incremental json.load on a file object
+                with open(data_file, 'rb') as f:
+                    raw_data = f.read()
+                self.data = orjson.loads(raw_data) if ORJSON_AVAILABLE else json.loads(raw_data)
                 logger.info(f"Loaded knowledge base with {len(self.data.get('categories', []))} categories")
             else:
                 # Create default knowledge base
@@ -38,142 +105,203 @@ class KnowledgeBase:
             
             # Extract categories
             self.categories = list(self.data.get('categories', {}).keys())
-            
+
         except Exception as e:
             logger.error(f"Error loading knowledge base: {str(e)}")
             self.data = {}
             self.categories = []
+
+        # Cache key for the pickled search index
+        self._index_cache_path = data_file + '.idx'
+        try:
+            self._data_mtime = os.stat(data_file).st_mtime
+        except OSError:
+            self._data_mtime = None
+
+    def _load_index_cache(self) -> bool:
+        """Load the pickled search index if it matches the JSON file's mtime"""
+        if self._data_mtime is None or not os.path.exists(self._index_cache_path):
+            return False
+
+        try:
+            with open(self._index_cache_path, 'rb') as f:
+                (cached_mtime, keywords_index, entries, patterns_by_language,
+                 greetings_normalized, help_normalized,
+                 responses_flat) = pickle.load(f)
+        except Exception as e:
+            logger.error(f"Error loading index cache: {str(e)}")
+            return False
+
+        if cached_mtime != self._data_mtime:
+            return False
+
+        self.keywords_index = keywords_index
+        self.entries = entries
+        self.patterns_by_language = patterns_by_language
+        self.greetings_normalized = greetings_normalized
+        self.help_normalized = help_normalized
+        self.responses_flat = responses_flat
+
+        # The automaton and compiled regexes are not pickled - rebuild
+        # them from the restored structures
+        self._build_token_automaton()
+        self._build_pattern_strings()
+        self._build_detection_regexes()
+
+        logger.info("Loaded search index from cache")
+        return True
+
+    def _save_index_cache(self):
+        """Persist the built search index next to the JSON data file"""
+        if self._data_mtime is None:
+            return
+
+        try:
+            payload = (self._data_mtime, self.keywords_index, self.entries,
+                       self.patterns_by_language, self.greetings_normalized,
+                       self.help_normalized, self.responses_flat)
+            with open(self._index_cache_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.error(f"Error saving index cache: {str(e)}")
     
     def create_default_knowledge_base(self, file_path: str):
-        """Create a comprehensive default agricultural knowledge base"""
-        default_data = {
-            "metadata": {
-                "version": "1.0",
-                "last_updated": "2025-01-15",
-                "languages": ["en", "hi"],
-                "total_entries": 200
-            },
-            "categories": {
-                "crop_planning": {
-                    "name": {
-                        "en": "Crop Planning and Timing",
-                        "hi": "फसल योजना और समय"
-                    },
-                    "entries": [
-                        {
-                            "id": "rice_planting_time",
-                            "question": {
-                                "en": ["when to plant rice", "rice planting season", "best time for rice cultivation"],
-                                "hi": ["चावल कब लगाएं", "चावल बोने का समय", "धान की खेती का समय"]
-                            },
-                            "answer": {
-                                "en": "Rice should be planted during monsoon season, typically June to July in most regions of India. For Kharif rice, plant after the first good rain when soil moisture is adequate. Transplant 20-25 day old seedlings in well-prepared, puddled fields.",
-                                "hi": "चावल मानसून के दौरान लगाना चाहिए, भारत के अधिकांश क्षेत्रों में आमतौर पर जून से जुलाई में। खरीफ चावल के लिए, जब मिट्टी में पर्याप्त नमी हो तो पहली अच्छी बारिश के बाद बोएं। 20-25 दिन पुराने पौधों को तैयार खेत में रोपें।"
-                            },
-                            "keywords": ["rice", "paddy", "monsoon", "kharif", "चावल", "धान", "खरीफ", "मानसून"]
-                        },
-                        {
-                            "id": "wheat_cultivation",
-                            "question": {
-                                "en": ["when to sow wheat", "wheat planting time", "rabi wheat season"],
-                                "hi": ["गेहूं कब बोएं", "गेहूं बोने का समय", "रबी गेहूं का मौसम"]
-                            },
-                            "answer": {
-                                "en": "Wheat is a Rabi crop, best sown from November to December. The ideal temperature for sowing is 18-25°C. Ensure adequate soil moisture and sow seeds at 2-3 cm depth with proper row spacing of 20-25 cm.",
-                                "hi": "गेहूं एक रबी की फसल है, जो नवंबर से दिसंबर में बोई जाती है। बुआई के लिए आदर्श तापमान 18-25°C है। पर्याप्त मिट्टी की नमी सुनिश्चित करें और बीजों को 2-3 सेमी गहराई में 20-25 सेमी की उचित पंक्ति दूरी के साथ बोएं।"
-                            },
-                            "keywords": ["wheat", "rabi", "november", "december", "गेहूं", "रबी", "नवंबर", "दिसंबर"]
-                        }
-                    ]
-                },
-                "soil_management": {
-                    "name": {
-                        "en": "Soil Management",
-                        "hi": "मिट्टी प्रबंधन"
-                    },
-                    "entries": [
-                        {
-                            "id": "soil_testing",
-                            "question": {
-                                "en": ["how to test soil", "soil testing methods", "check soil quality"],
-                                "hi": ["मिट्टी की जांच कैसे करें", "भूमि परीक्षण", "मिट्टी की गुणवत्ता"]
-                            },
-                            "answer": {
-                                "en": "Test your soil every 2-3 years. Collect samples from 6-8 inches depth from multiple spots. Test for pH, nitrogen, phosphorus, potassium, and organic matter. Contact your local agriculture extension office or use soil testing kits.",
-                                "hi": "हर 2-3 साल में अपनी मिट्टी की जांच करवाएं। कई स्थानों से 6-8 इंच की गहराई से नमूने लें। pH, नाइट्रोजन, फास्फोरस, पोटेशियम और जैविक पदार्थ की जांच कराएं। स्थानीय कृषि विस्तार कार्यालय से संपर्क करें।"
-                            },
-                            "keywords": ["soil test", "pH", "nitrogen", "phosphorus", "potassium", "मिट्टी जांच", "नाइट्रोजन", "फास्फोरस", "पोटेशियम"]
-                        }
-                    ]
-                }
-            },
-            "common_questions": {
-                "greetings": {
-                    "en": ["hello", "hi", "good morning", "good evening", "namaste"],
-                    "hi": ["नमस्ते", "नमस्कार", "हैलो", "सुप्रभात", "शुभ संध्या"]
-                },
-                "help": {
-                    "en": ["help", "what can you do", "how to use", "assistance"],
-                    "hi": ["सहायता", "मदद", "आप क्या कर सकते हैं", "कैसे उपयोग करें"]
-                }
-            },
-            "responses": {
-                "greetings": {
-                    "en": "Hello! I'm your agricultural advisor. You can ask me about crop timing, soil management, irrigation, pest control, fertilizers, and weather-related farming questions. How can I help you today?",
-                    "hi": "नमस्ते! मैं आपका कृषि सलाहकार हूं। आप मुझसे फसल का समय, मिट्टी प्रबंधन, सिंचाई, कीट नियंत्रण, उर्वरक, और मौसम संबंधी खेती के प्रश्न पूछ सकते हैं। आज मैं आपकी कैसे सहायता कर सकता हूं?"
-                },
-                "help": {
-                    "en": "I can help you with:\n• Crop planting times and seasons\n• Soil management and testing\n• Irrigation and water management\n• Pest and disease control\n• Fertilizer recommendations\n• Weather adaptation strategies\n\nJust ask your question in English or Hindi!",
-                    "hi": "मैं इन विषयों में आपकी सहायता कर सकता हूं:\n• फसल लगाने का समय और मौसम\n• मिट्टी प्रबंधन और परीक्षण\n• सिंचाई और जल प्रबंधन\n• कीट और रोग नियंत्रण\n• उर्वरक सिफारिशें\n• मौसम अनुकूलन रणनीतियां\n\nअपना प्रश्न अंग्रेजी या हिंदी में पूछें!"
-                },
-                "not_found": {
-                    "en": "I'm sorry, I don't have specific information about that topic in my knowledge base. Could you please rephrase your question or ask about crop planning, soil management, irrigation, pest control, fertilizers, or weather-related farming topics?",
-                    "hi": "क्षमा करें, मेरे ज्ञान आधार में उस विषय के बारे में विशिष्ट जानकारी नहीं है। कृपया अपना प्रश्न दूसरे तरीके से पूछें या फसल योजना, मिट्टी प्रबंधन, सिंचाई, कीट नियंत्रण, उर्वरक, या मौसम संबंधी खेती के विषयों के बारे में पूछें।"
-                }
-            }
-        }
-        
+        """Create the default agricultural knowledge base from the shipped JSON"""
+        default_file = os.path.join(os.path.dirname(__file__),
+                                    '../data/agricultural_data.default.json')
+
+        with open(default_file, 'rb') as f:
+            raw_data = f.read()
+
         # Save to file
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(default_data, f, ensure_ascii=False, indent=2)
-        
-        self.data = default_data
+        with open(file_path, 'wb') as f:
+            f.write(raw_data)
+
+        self.data = orjson.loads(raw_data) if ORJSON_AVAILABLE else json.loads(raw_data)
     
     def build_search_index(self):
         """Build keyword search index for fast retrieval"""
         self.keywords_index = {}
-        
+        self.patterns_by_language = {}
+        self.entries = []
+
+        # Normalize greeting/help phrases once - is_greeting and
+        # is_help_request scan these on every query
+        common_questions = self.data.get('common_questions', {}) if self.data else {}
+        greetings = common_questions.get('greetings', {})
+        help_words = common_questions.get('help', {})
+        languages = set(greetings) | set(help_words) | {'en'}
+        self.greetings_normalized = {
+            lang: [self.normalize_text(g) for g in
+                   dict.fromkeys(greetings.get(lang, []) + greetings.get('en', []))]
+            for lang in languages
+        }
+        self.help_normalized = {
+            lang: [self.normalize_text(h) for h in
+                   dict.fromkeys(help_words.get(lang, []) + help_words.get('en', []))]
+            for lang in languages
+        }
+        self._build_detection_regexes()
+
+        # Flatten canned responses to one dict keyed by (type, language)
+        self.responses_flat = {}
+        responses = self.data.get('responses', {}) if self.data else {}
+        for response_type, translations in responses.items():
+            for lang, text in translations.items():
+                self.responses_flat[(response_type, lang)] = text
+
         if not self.data or 'categories' not in self.data:
+            # Still build the (empty) automaton and pattern strings so
+            # search degrades gracefully instead of raising
+            self._build_token_automaton()
+            self._build_pattern_strings()
             return
-        
+
         for category_id, category_data in self.data['categories'].items():
             for entry in category_data.get('entries', []):
-                entry_id = entry['id']
-                keywords = entry.get('keywords', [])
-                
-                # Index all keywords for this entry
-                for keyword in keywords:
-                    keyword_clean = self.normalize_text(keyword.lower())
-                    if keyword_clean not in self.keywords_index:
-                        self.keywords_index[keyword_clean] = []
-                    self.keywords_index[keyword_clean].append({
-                        'category': category_id,
-                        'entry_id': entry_id,
-                        'entry': entry
-                    })
+                entry_index = len(self.entries)
+                self.entries.append({
+                    'category': category_id,
+                    'entry_id': entry['id'],
+                    'entry': entry
+                })
+
+                # Keyword posting lists hold integer entry IDs; interned
+                # tokens make the dict lookups pointer comparisons
+                for keyword in entry.get('keywords', []):
+                    keyword_clean = sys.intern(self.normalize_text(keyword.lower()))
+                    self.keywords_index.setdefault(keyword_clean, []).append(entry_index)
+
+                # Normalize question patterns once per language so fuzzy
+                # search never re-normalizes at query time
+                for lang, patterns in entry.get('question', {}).items():
+                    pattern_list = self.patterns_by_language.setdefault(lang, [])
+                    for pattern in patterns:
+                        pattern_list.append(
+                            (self.normalize_text(pattern), category_id, entry))
+
+        self._build_token_automaton()
+        self._build_pattern_strings()
+
+    def _build_detection_regexes(self):
+        """Compile greeting/help phrase lists into single alternation regexes"""
+        def compile_alternations(phrases_by_language):
+            return {
+                lang: re.compile('|'.join(
+                    map(re.escape, sorted(phrases, key=len, reverse=True))))
+                for lang, phrases in phrases_by_language.items() if phrases
+            }
+
+        self._greeting_regexes = compile_alternations(self.greetings_normalized)
+        self._help_regexes = compile_alternations(self.help_normalized)
+
+    def _build_pattern_strings(self):
+        """Flat per-language pattern lists for the batched fuzzy scorer"""
+        self._pattern_strings = {
+            lang: [pattern for pattern, _, _ in patterns]
+            for lang, patterns in self.patterns_by_language.items()
+        }
+
+    def _build_token_automaton(self):
+        """Build an Aho-Corasick automaton over pattern and keyword tokens"""
+        self.search_automaton = None
+
+        if not AHOCORASICK_AVAILABLE:
+            return
+
+        # token -> set of integer entry IDs
+        token_postings = {}
+
+        for entry_index, match in enumerate(self.entries):
+            entry = match['entry']
+
+            tokens = set()
+            for keyword in entry.get('keywords', []):
+                normalized = self.normalize_text(keyword)
+                tokens.add(normalized)
+                tokens.update(normalized.split())
+            for patterns in entry.get('question', {}).values():
+                for pattern in patterns:
+                    tokens.update(self.normalize_text(pattern).split())
+
+            for token in tokens:
+                if token:
+                    token_postings.setdefault(token, set()).add(entry_index)
+
+        if not token_postings:
+            return
+
+        automaton = ahocorasick.Automaton()
+        for token, postings in token_postings.items():
+            automaton.add_word(token, (token, tuple(sorted(postings))))
+        automaton.make_automaton()
+
+        self.search_automaton = automaton
     
     def normalize_text(self, text: str) -> str:
         """Normalize text for better matching"""
-        # Remove diacritics and normalize unicode
-        text = unicodedata.normalize('NFKD', text)
-        text = ''.join(c for c in text if not unicodedata.combining(c))
-        
-        # Remove punctuation and extra spaces
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text.lower()
+        return _normalize_text(text)
     
     def get_answer(self, question: str, language: str = 'en') -> str:
         """Get answer for a given question"""
@@ -203,69 +331,120 @@ class KnowledgeBase:
     
     def search_entries(self, question: str, language: str) -> List[Dict]:
         """Search for entries matching the question"""
-        matches = []
-        question_words = question.split()
-        
-        # Keyword-based search
-        for word in question_words:
-            if word in self.keywords_index:
-                for match in self.keywords_index[word]:
-                    if match not in matches:
-                        matches.append(match)
-        
+        if self.search_automaton is not None:
+            matches = self._search_with_automaton(question)
+        else:
+            # Fallback: accumulate candidate entry IDs from the posting
+            # lists, deduplicating tokens and skipping one-character ones
+            candidate_ids = set()
+            for token in set(question.split()):
+                if len(token) < 2:
+                    continue
+                candidate_ids.update(self.keywords_index.get(token, ()))
+            matches = [self.entries[entry_index]
+                       for entry_index in sorted(candidate_ids)]
+
         # Question pattern matching
         if not matches:
             matches = self.search_by_patterns(question, language)
-        
+
         return matches
+
+    def _search_with_automaton(self, question: str) -> List[Dict]:
+        """Single-pass token scan aggregating hit counts per entry"""
+        hit_counts = {}
+        last_index = len(question) - 1
+
+        # An entry matching more than half the question's words is a
+        # clear winner - stop scanning as soon as one crosses that bar
+        hit_threshold = max(2, (question.count(' ') + 1) // 2)
+
+        for end_index, (token, postings) in self.search_automaton.iter(question):
+            # Only accept whole-word hits
+            start_index = end_index - len(token) + 1
+            if start_index > 0 and question[start_index - 1] != ' ':
+                continue
+            if end_index < last_index and question[end_index + 1] != ' ':
+                continue
+
+            for entry_index in postings:
+                hits = hit_counts.get(entry_index, 0) + 1
+                if hits > hit_threshold:
+                    return [self.entries[entry_index]]
+                hit_counts[entry_index] = hits
+
+        return [self.entries[entry_index] for entry_index, _ in
+                sorted(hit_counts.items(), key=lambda item: item[1], reverse=True)]
     
     def search_by_patterns(self, question: str, language: str) -> List[Dict]:
         """Search by matching question patterns"""
         matches = []
-        
-        for category_id, category_data in self.data.get('categories', {}).items():
-            for entry in category_data.get('entries', []):
-                entry_questions = entry.get('question', {}).get(language, [])
-                
-                for pattern in entry_questions:
-                    pattern_normalized = self.normalize_text(pattern)
-                    similarity = SequenceMatcher(None, question, pattern_normalized).ratio()
-                    
-                    if similarity > 0.3:  # Threshold for similarity
-                        matches.append({
-                            'category': category_id,
-                            'entry_id': entry['id'],
-                            'entry': entry,
-                            'similarity': similarity
-                        })
-        
-        return matches
-    
+        patterns = self.patterns_by_language.get(language, [])
+
+        if RAPIDFUZZ_CDIST_AVAILABLE and patterns:
+            # Score the question against every pattern in one C call
+            scores = rf_process.cdist([question], self._pattern_strings[language],
+                                      scorer=fuzz.ratio, workers=1)[0]
+
+            for pattern_index in numpy.flatnonzero(scores > 30.0):
+                _, category_id, entry = patterns[pattern_index]
+                matches.append({
+                    'category': category_id,
+                    'entry_id': entry['id'],
+                    'entry': entry,
+                    'similarity': float(scores[pattern_index]) / 100.0
+                })
+
+            return self._top_matches(matches)
+
+        # difflib caches statistics about seq2, so one matcher with the
+        # question pinned as seq2 is reused across all patterns
+        matcher = None if RAPIDFUZZ_AVAILABLE else SequenceMatcher(None, '', question)
+
+        for pattern_normalized, category_id, entry in patterns:
+            if RAPIDFUZZ_AVAILABLE:
+                similarity = fuzz.ratio(question, pattern_normalized) / 100.0
+            else:
+                matcher.set_seq1(pattern_normalized)
+                # Cheap upper bounds prune most patterns before the
+                # quadratic ratio() computation
+                if (matcher.real_quick_ratio() <= 0.3
+                        or matcher.quick_ratio() <= 0.3):
+                    continue
+                similarity = matcher.ratio()
+
+            if similarity > 0.3:  # Threshold for similarity
+                matches.append({
+                    'category': category_id,
+                    'entry_id': entry['id'],
+                    'entry': entry,
+                    'similarity': similarity
+                })
+
+        return self._top_matches(matches)
+
+    @staticmethod
+    def _top_matches(matches: List[Dict], limit: int = 5) -> List[Dict]:
+        """Keep only the best-scoring matches, best first"""
+        # nlargest avoids sorting the full candidate list; callers mostly
+        # just take the first element
+        return heapq.nlargest(limit, matches, key=lambda m: m['similarity'])
+
     def is_greeting(self, text: str, language: str) -> bool:
         """Check if text is a greeting"""
-        greetings = self.data.get('common_questions', {}).get('greetings', {})
-        greeting_words = greetings.get(language, []) + greetings.get('en', [])
-        
-        for greeting in greeting_words:
-            if self.normalize_text(greeting) in text:
-                return True
-        return False
-    
+        regex = self._greeting_regexes.get(language) or self._greeting_regexes.get('en')
+        return bool(regex and regex.search(text))
+
     def is_help_request(self, text: str, language: str) -> bool:
         """Check if text is a help request"""
-        help_words = self.data.get('common_questions', {}).get('help', {})
-        help_patterns = help_words.get(language, []) + help_words.get('en', [])
-        
-        for pattern in help_patterns:
-            if self.normalize_text(pattern) in text:
-                return True
-        return False
+        regex = self._help_regexes.get(language) or self._help_regexes.get('en')
+        return bool(regex and regex.search(text))
     
     def get_response(self, response_type: str, language: str) -> str:
         """Get predefined response"""
-        responses = self.data.get('responses', {})
-        response_data = responses.get(response_type, {})
-        return response_data.get(language, response_data.get('en', 'I apologize, but I cannot help with that right now.'))
+        return (self.responses_flat.get((response_type, language))
+                or self.responses_flat.get((response_type, 'en'))
+                or 'I apologize, but I cannot help with that right now.')
     
     def get_categories(self) -> List[Dict]:
         """Get all available categories"""
@@ -7,8 +7,8 @@ Browser-based speech recognition with optional TTS fallback
 import os
 import json
 import logging
+import re
 import threading
-import time
 from typing import Optional, Dict
 
 # Try importing TTS, but don't require it
@@ -24,19 +24,37 @@ VOSK_AVAILABLE = False  # We'll use browser speech recognition
 
 logger = logging.getLogger(__name__)
 
+# Voice-name patterns per language, compiled once at import
+_VOICE_RES = {
+    'en': re.compile(r'english|en-us|en-gb', re.IGNORECASE),
+    'hi': re.compile(r'hindi|hi-in|indian', re.IGNORECASE),
+}
+
 class SpeechHandler:
     def __init__(self):
         self.tts_engine = None
         self.is_listening = False
-        self.stop_listening_flag = threading.Event()
-        
+        self.stop_listening_flag = False
+        self._tts_init_tried = False
+        self._tts_init_lock = threading.Lock()
+        self._voice_cache = {}
+
         self._initialize_components()
-    
+
     def _initialize_components(self):
         """Initialize speech components - browser-based approach"""
-        
-        # Try to initialize TTS if available
-        if TTS_AVAILABLE:
+
+        # TTS is initialized lazily on first speak() - pyttsx3.init()
+        # probes audio drivers and slows down startup
+        logger.info("Speech handler initialized for browser-based recognition")
+
+    def _init_tts(self):
+        """Initialize the TTS engine on first use (at most once)"""
+        with self._tts_init_lock:
+            if self._tts_init_tried:
+                return
+            self._tts_init_tried = True
+
             try:
                 self.tts_engine = pyttsx3.init()
                 self._configure_tts()
@@ -44,8 +62,6 @@ class SpeechHandler:
             except Exception as e:
                 logger.error(f"Failed to initialize TTS: {str(e)}")
                 self.tts_engine = None
-        
-        logger.info("Speech handler initialized for browser-based recognition")
     
     def _configure_tts(self):
         """Configure TTS engine settings"""
@@ -78,7 +94,10 @@ class SpeechHandler:
         """Convert text to speech"""
         if not text.strip():
             return False
-        
+
+        if self.tts_engine is None and TTS_AVAILABLE and not self._tts_init_tried:
+            self._init_tts()
+
         # Try local TTS first, fallback to browser
         if self.tts_engine:
             try:
@@ -103,22 +122,25 @@ class SpeechHandler:
         """Set appropriate voice for language"""
         if not self.tts_engine:
             return
-        
+
+        # Voice lookup is memoized - getProperty('voices') re-enumerates
+        # system voices on every call otherwise
+        if language in self._voice_cache:
+            voice_id = self._voice_cache[language]
+            if voice_id is not None:
+                self.tts_engine.setProperty('voice', voice_id)
+            return
+
         voices = self.tts_engine.getProperty('voices')
         if not voices:
             return
-        
-        # Language preferences
-        language_keywords = {
-            'en': ['english', 'en-us', 'en-gb'],
-            'hi': ['hindi', 'hi-in', 'indian']
-        }
-        
-        target_keywords = language_keywords.get(language, ['english'])
-        
+
+        voice_re = _VOICE_RES.get(language, _VOICE_RES['en'])
+
+        self._voice_cache[language] = None
         for voice in voices:
-            voice_name = voice.name.lower()
-            if any(keyword in voice_name for keyword in target_keywords):
+            if voice_re.search(voice.name):
+                self._voice_cache[language] = voice.id
                 self.tts_engine.setProperty('voice', voice.id)
                 break
     
@@ -132,7 +154,7 @@ class SpeechHandler:
     
     def stop_listening(self):
         """Stop current listening session"""
-        self.stop_listening_flag.set()
+        self.stop_listening_flag = True
         self.is_listening = False
         logger.info("Voice recognition stop requested")
     